@@ -7,11 +7,21 @@ PDF 指定ページテキスト抽出 CLI ツール
 """
 
 import argparse
+import atexit
+import collections
+import functools
+import hashlib
+import importlib.util
+import io
+import os
+import queue
 import sys
 import logging
+import tempfile
+import threading
 import unicodedata
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 try:
     from pypdf import PdfReader
@@ -20,27 +30,59 @@ except ImportError:
     print("pip install -r requirements.txt を実行してください。", file=sys.stderr)
     sys.exit(1)
 
-# pdfminer.six は任意のエンジンとしてインポート
-try:
-    from pdfminer.high_level import extract_text as pdfminer_extract_text
-    from pdfminer.layout import LAParams
-    PDFMINER_AVAILABLE = True
-except ImportError:
-    PDFMINER_AVAILABLE = False
 
-# OCR関連のライブラリをインポート
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+def _modules_available(*names: str) -> bool:
+    """指定モジュールがすべてインポート可能か（実際にはインポートせずに）確認"""
+    return all(importlib.util.find_spec(name) is not None for name in names)
 
-try:
-    import pytesseract
-    from PIL import Image
-    PYTESSERACT_AVAILABLE = True
-except ImportError:
-    PYTESSERACT_AVAILABLE = False
+
+# 任意の依存ライブラリは起動時間を短縮するため、使用する関数内で遅延インポートする
+# pdfminer.six は任意のエンジン
+PDFMINER_AVAILABLE = _modules_available('pdfminer')
+
+# pypdfium2 は任意の高速エンジン
+PDFIUM_AVAILABLE = _modules_available('pypdfium2')
+
+# OCR関連のライブラリ
+PYMUPDF_AVAILABLE = _modules_available('fitz')
+PYTESSERACT_AVAILABLE = _modules_available('numpy', 'pytesseract', 'PIL')
+
+# tesserocr はTesseractをプロセス内で呼び出せる任意の高速OCRバックエンド
+TESSEROCR_AVAILABLE = _modules_available('numpy', 'tesserocr', 'PIL')
+
+OCR_AVAILABLE = PYTESSERACT_AVAILABLE or TESSEROCR_AVAILABLE
+
+# OpenCV はOCR前処理（二値化）用の任意ライブラリ
+CV2_AVAILABLE = _modules_available('cv2')
+
+# OCR用レンダリングの長辺の目標ピクセル数とズーム倍率の範囲
+# （Tesseractの精度には長辺1800px程度で十分で、OCR時間は画素数に比例する）
+_OCR_TARGET_LONG_EDGE_PX = 1800
+_OCR_MIN_ZOOM = 1.0
+_OCR_MAX_ZOOM = 4.0
+
+# OCR待ちのレンダリング済み画像の最大数（メモリ使用量の上限）
+_OCR_QUEUE_SIZE = 2
+
+# 開いたままキャッシュしている PyMuPDF のドキュメント（(パス, 更新日時) -> fitz.Document）
+_OPEN_DOCS = collections.OrderedDict()
+_OPEN_DOCS_MAX = 4
+_OPEN_DOCS_LOCK = threading.Lock()
+
+# 言語ごとに初期化済みの tesserocr API（ページをまたいで再利用する）
+# 初期化に失敗した言語には、再試行しないようその例外を保持する
+# PyTessBaseAPI はスレッドセーフではないため、取得から認識までを _TESS_LOCK で保護する
+_TESS_APIS = {}
+_TESS_LOCK = threading.Lock()
+
+# 抽出結果のディスクキャッシュの保存先（--cache または環境変数 PDFTOTXT_CACHE で有効化）
+_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'pdftotxt'
+
+# ディスクキャッシュに保持する最大エントリ数（超えた分は最後に使われた日時が古い順に削除）
+_CACHE_MAX_ENTRIES = 256
+
+# このサイズ以下のPDFはメモリに読み込んでから解析する
+_IN_MEMORY_MAX_BYTES = 100 * 1024 * 1024
 
 
 def setup_logging():
@@ -54,10 +96,12 @@ def setup_logging():
     stderr_handler = logging.StreamHandler(sys.stderr)
     stderr_handler.setLevel(logging.ERROR)
     
+    # main() が同一プロセスで繰り返し呼ばれても、その時点の標準出力・標準エラー出力を使うよう再設定
     logging.basicConfig(
         level=logging.INFO,
         format='%(levelname)s: %(message)s',
-        handlers=[stdout_handler, stderr_handler]
+        handlers=[stdout_handler, stderr_handler],
+        force=True
     )
 
 
@@ -82,6 +126,42 @@ def validate_pdf_file(pdf_path: Path) -> None:
         logging.warning(f"ファイル拡張子が .pdf ではありません: {pdf_path}")
 
 
+def _normalize_nfc(text: str) -> str:
+    """
+    Unicode NFC正規化を適用
+    
+    ASCIIのみ、または既にNFCのテキストは正規化処理を省略します。
+    
+    Args:
+        text: 正規化するテキスト
+        
+    Returns:
+        NFC正規化されたテキスト
+    """
+    if text.isascii() or unicodedata.is_normalized('NFC', text):
+        return text
+    return unicodedata.normalize('NFC', text)
+
+
+def _pdf_source(pdf_path: Path):
+    """
+    PDFパーサーに渡す入力を返す
+    
+    小〜中規模のPDFは一度に読み込んで BytesIO として渡し、
+    ファイルハンドルに対する細かな seek/read を避けます。
+    大きなPDFはメモリ使用量を抑えるためパスのまま渡します。
+    
+    Args:
+        pdf_path: PDFファイルのパス
+        
+    Returns:
+        io.BytesIO またはファイルパスの文字列
+    """
+    if pdf_path.stat().st_size <= _IN_MEMORY_MAX_BYTES:
+        return io.BytesIO(pdf_path.read_bytes())
+    return str(pdf_path)
+
+
 def extract_page_text_pypdf(pdf_path: Path, page_number: int) -> str:
     """
     pypdf を使用してPDFの指定ページからテキストを抽出
@@ -98,7 +178,7 @@ def extract_page_text_pypdf(pdf_path: Path, page_number: int) -> str:
         Exception: PDF読み込みやテキスト抽出に失敗した場合
     """
     try:
-        reader = PdfReader(str(pdf_path))
+        reader = PdfReader(_pdf_source(pdf_path))
         total_pages = len(reader.pages)
         
         logging.info(f"PDF総ページ数: {total_pages}")
@@ -123,7 +203,7 @@ def extract_page_text_pypdf(pdf_path: Path, page_number: int) -> str:
             return ""
         
         # Unicode NFC正規化を適用（アキュート記号などの結合文字を正規化）
-        text = unicodedata.normalize('NFC', text)
+        text = _normalize_nfc(text)
         
         return text
         
@@ -156,6 +236,9 @@ def extract_page_text_pdfminer(pdf_path: Path, page_number: int) -> str:
             "pip install pdfminer.six を実行してインストールしてください。"
         )
     
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.layout import LAParams
+    
     try:
         # LAParams でレイアウト解析パラメータを設定
         laparams = LAParams(
@@ -173,7 +256,7 @@ def extract_page_text_pdfminer(pdf_path: Path, page_number: int) -> str:
         
         # テキスト抽出（ページ指定）
         text = pdfminer_extract_text(
-            str(pdf_path),
+            _pdf_source(pdf_path),
             page_numbers=[page_index],
             laparams=laparams
         )
@@ -183,7 +266,7 @@ def extract_page_text_pdfminer(pdf_path: Path, page_number: int) -> str:
             return ""
         
         # Unicode NFC正規化を適用
-        text = unicodedata.normalize('NFC', text)
+        text = _normalize_nfc(text)
         
         return text
         
@@ -194,24 +277,266 @@ def extract_page_text_pdfminer(pdf_path: Path, page_number: int) -> str:
         raise
 
 
-def extract_page_text_ocr(pdf_path: Path, page_number: int, lang: str = 'jpn+eng') -> str:
+def extract_page_text_pdfium(pdf_path: Path, page_number: int) -> str:
     """
-    OCR（pytesseract）を使用してPDFの指定ページからテキストを抽出
-    
-    画像形式のPDF（テキスト層を持たないPDF）からテキストを抽出する際に使用します。
+    pypdfium2 を使用してPDFの指定ページからテキストを抽出
     
     Args:
         pdf_path: PDFファイルのパス
         page_number: ページ番号（1始まり）
-        lang: OCRで使用する言語（デフォルト: 'jpn+eng'）
         
     Returns:
         抽出されたテキスト（Unicode NFC正規化済み）
         
     Raises:
         ValueError: ページ番号が範囲外の場合
-        ImportError: PyMuPDF または pytesseract がインストールされていない場合
-        Exception: PDF読み込みやOCR処理に失敗した場合
+        ImportError: pypdfium2 がインストールされていない場合
+        Exception: PDF読み込みやテキスト抽出に失敗した場合
+    """
+    if not PDFIUM_AVAILABLE:
+        raise ImportError(
+            "pypdfium2 がインストールされていません。\n"
+            "pip install pypdfium2 を実行してインストールしてください。"
+        )
+    
+    import pypdfium2 as pdfium
+    
+    try:
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            total_pages = len(pdf)
+            
+            logging.info(f"PDF総ページ数: {total_pages}")
+            
+            # ページ番号の検証（1始まりから0始まりに変換）
+            page_index = page_number - 1
+            
+            if page_index < 0 or page_index >= total_pages:
+                raise ValueError(
+                    f"ページ番号が範囲外です: {page_number} "
+                    f"(有効範囲: 1-{total_pages})"
+                )
+            
+            logging.info(f"{pdf_path} の {page_number} ページ目を解析中...")
+            
+            # テキスト抽出
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+        finally:
+            pdf.close()
+        
+        if not text or not text.strip():
+            logging.warning(f"ページ {page_number} にテキストが見つかりませんでした")
+            return ""
+        
+        # PDFium は改行を CRLF で返すため、他のエンジンに合わせて LF に統一
+        text = text.replace('\r\n', '\n')
+        
+        # Unicode NFC正規化を適用
+        text = _normalize_nfc(text)
+        
+        return text
+        
+    except Exception as e:
+        if isinstance(e, (ValueError, ImportError)):
+            raise
+        logging.error(f"PDFの読み込みまたはテキスト抽出に失敗しました: {e}")
+        raise
+
+
+# テキスト層を抽出するエンジン名と抽出関数の対応
+_TEXT_EXTRACTORS = {
+    'pypdf': extract_page_text_pypdf,
+    'pdfminer': extract_page_text_pdfminer,
+    'pypdfium2': extract_page_text_pdfium,
+}
+
+
+def _open_doc(pdf_path_str: str, mtime_ns: int):
+    """
+    PyMuPDF のドキュメントを開く（パスと更新日時をキーにキャッシュ）
+    
+    同じPDFに対する繰り返しの呼び出しでは解析済みのドキュメントを再利用します。
+    PDFが更新された場合は更新日時が変わるため、開き直されます。
+    キャッシュしたドキュメントは呼び出し側で閉じないでください（_close_all_docs で閉じます）。
+    
+    Args:
+        pdf_path_str: PDFファイルのパス
+        mtime_ns: PDFファイルの更新日時（ナノ秒）
+        
+    Returns:
+        fitz.Document
+    """
+    import fitz  # PyMuPDF
+    
+    key = (pdf_path_str, mtime_ns)
+    with _OPEN_DOCS_LOCK:
+        doc = _OPEN_DOCS.get(key)
+        if doc is not None:
+            _OPEN_DOCS.move_to_end(key)
+            return doc
+        
+        doc = fitz.open(pdf_path_str)
+        _OPEN_DOCS[key] = doc
+        if len(_OPEN_DOCS) > _OPEN_DOCS_MAX:
+            # 追い出したドキュメントは他のスレッドが使用中の可能性があるため、
+            # ここでは閉じずに参照が無くなった時点での解放に任せる
+            _OPEN_DOCS.popitem(last=False)
+        return doc
+
+
+def _close_all_docs() -> None:
+    """キャッシュしているドキュメントをすべて閉じて破棄"""
+    with _OPEN_DOCS_LOCK:
+        for doc in _OPEN_DOCS.values():
+            doc.close()
+        _OPEN_DOCS.clear()
+
+
+atexit.register(_close_all_docs)
+
+
+def _close_tess_apis() -> None:
+    """初期化済みの tesserocr API をすべて解放"""
+    with _TESS_LOCK:
+        for api in _TESS_APIS.values():
+            if not isinstance(api, Exception):
+                api.End()
+        _TESS_APIS.clear()
+
+
+atexit.register(_close_tess_apis)
+
+
+def _get_tess_api(lang: str):
+    """
+    指定言語の tesserocr API を取得（初回のみ初期化）
+    
+    初期化に失敗した言語は失敗を記録し、以降の呼び出しでは初期化を再試行せずに
+    同じ例外を送出します。
+    _TESS_LOCK を保持した状態で呼び出してください。
+    
+    Args:
+        lang: OCRで使用する言語
+        
+    Returns:
+        tesserocr.PyTessBaseAPI
+        
+    Raises:
+        ImportError: tesserocr をインポートできない場合（libtesseract の不一致など）
+        RuntimeError: Tesseractの初期化に失敗した場合
+    """
+    api = _TESS_APIS.get(lang)
+    if api is None:
+        import tesserocr
+        
+        try:
+            api = tesserocr.PyTessBaseAPI(lang=lang)
+        except RuntimeError as e:
+            _TESS_APIS[lang] = e
+            raise
+        _TESS_APIS[lang] = api
+    elif isinstance(api, Exception):
+        raise api
+    return api
+
+
+def _ocr_image(img, lang: str) -> str:
+    """
+    画像に対してOCRを実行
+    
+    tesserocr が利用可能な場合はプロセス内のAPIを再利用し、
+    利用できない場合は pytesseract（Tesseractのサブプロセス）を使用します。
+    複数のスレッドから同時に呼び出された場合、tesserocr での認識は1つずつ実行されます。
+    
+    Args:
+        img: PIL Image
+        lang: OCRで使用する言語
+        
+    Returns:
+        OCRで抽出されたテキスト
+    """
+    global TESSEROCR_AVAILABLE
+    
+    if TESSEROCR_AVAILABLE:
+        with _TESS_LOCK:
+            first_attempt = lang not in _TESS_APIS
+            try:
+                api = _get_tess_api(lang)
+            except ImportError as e:
+                # インストールされていてもインポートできない場合（libtesseract の不一致など）は
+                # 以降の呼び出しでも再試行しないよう、利用不可として扱う
+                TESSEROCR_AVAILABLE = False
+                if not PYTESSERACT_AVAILABLE:
+                    raise
+                logging.warning(f"tesserocr をインポートできないため pytesseract を使用します: {e}")
+            except RuntimeError as e:
+                if not PYTESSERACT_AVAILABLE:
+                    raise
+                # 初期化の失敗は言語ごとに記録されるため、警告は最初の1回だけ出す
+                if first_attempt:
+                    logging.warning(f"tesserocr の初期化に失敗したため pytesseract を使用します: {e}")
+            else:
+                # 他のスレッドの SetImage と入れ違わないよう、画像の設定と認識をロック内で続けて行う
+                api.SetImage(img)
+                return api.GetUTF8Text()
+    
+    import pytesseract
+    
+    return pytesseract.image_to_string(img, lang=lang)
+
+
+def _preprocess_for_ocr(arr):
+    """
+    OCR前処理としてグレースケール化と適応的二値化を行う
+    
+    Args:
+        arr: pixmapのサンプルを参照する numpy 配列（高さ x 幅 x 3 のRGB）
+        
+    Returns:
+        二値化された PIL Image（'L' モード）
+    """
+    import cv2
+    from PIL import Image
+    
+    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+    binary = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+    )
+    return Image.fromarray(binary)
+
+
+def _ocr_zoom(page, dpi: Optional[int] = None) -> float:
+    """
+    OCR用にページをレンダリングする際のズーム倍率を求める
+    
+    DPIが指定されていない場合は、ページの長辺が約1800pxになるよう
+    倍率を決めます（1.0〜4.0 の範囲に制限）。
+    
+    Args:
+        page: fitz.Page
+        dpi: レンダリング解像度。Noneの場合はページサイズから自動決定
+        
+    Returns:
+        ズーム倍率
+    """
+    if dpi is not None:
+        return dpi / 72.0
+    
+    long_edge_pt = max(page.rect.width, page.rect.height)
+    zoom = _OCR_TARGET_LONG_EDGE_PX / long_edge_pt
+    return min(max(zoom, _OCR_MIN_ZOOM), _OCR_MAX_ZOOM)
+
+
+def _check_ocr_dependencies(preprocess: bool) -> None:
+    """
+    OCRに必要なライブラリが利用可能か確認
+    
+    Raises:
+        ImportError: PyMuPDF、pytesseract、または（preprocess指定時に）OpenCV がインストールされていない場合
     """
     if not PYMUPDF_AVAILABLE:
         raise ImportError(
@@ -219,58 +544,167 @@ def extract_page_text_ocr(pdf_path: Path, page_number: int, lang: str = 'jpn+eng
             "pip install PyMuPDF を実行してインストールしてください。"
         )
     
-    if not PYTESSERACT_AVAILABLE:
+    if not OCR_AVAILABLE:
         raise ImportError(
             "pytesseract がインストールされていません。\n"
             "pip install pytesseract を実行してインストールしてください。\n"
             "また、Tesseractエンジンのインストールも必要です。詳細はREADMEを参照してください。"
         )
     
+    if preprocess and not CV2_AVAILABLE:
+        raise ImportError(
+            "OpenCV がインストールされていません。\n"
+            "pip install opencv-python-headless を実行してインストールしてください。"
+        )
+
+
+def _put_unless_stopped(out_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """
+    キューに要素を追加（停止要求があれば諦める）
+    
+    Returns:
+        追加できた場合は True
+    """
+    while not stop_event.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _render_pages_for_ocr(
+    doc,
+    page_numbers: List[int],
+    dpi: Optional[int],
+    out_queue: queue.Queue,
+    stop_event: threading.Event
+) -> None:
+    """
+    ページを順に画像へレンダリングしてキューに渡す（OCRパイプラインの生産者スレッド）
+    
+    各ページについて (ページ番号, pixmap, numpy配列) を、終了時に None を、
+    エラー時には例外オブジェクトをキューに入れます。
+    samples_mv は pixmap のメモリを直接参照するため、pixmap も一緒に渡して
+    OCRが終わるまで保持させます。
+    """
+    import fitz  # PyMuPDF
+    import numpy as np
+    
     try:
-        # PDFを開く
-        doc = fitz.open(str(pdf_path))
-        total_pages = len(doc)
-        
-        # ページ番号の検証（1始まりから0始まりに変換）
-        page_index = page_number - 1
-        
-        if page_index < 0 or page_index >= total_pages:
-            doc.close()
-            raise ValueError(
-                f"ページ番号が範囲外です: {page_number} "
-                f"(有効範囲: 1-{total_pages})"
-            )
-        
-        logging.info(f"{pdf_path} の {page_number} ページ目をOCRで解析中...")
-        logging.info(f"使用言語: {lang}")
-        
-        # ページを取得
-        page = doc[page_index]
-        
-        # ページを画像（pixmap）に変換（150 DPIでレンダリング）
-        zoom = 150 / 72.0  # 150 DPI
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
+        for page_number in page_numbers:
+            page = doc[page_number - 1]
+            
+            # ページを画像（pixmap）に変換
+            zoom = _ocr_zoom(page, dpi)
+            mat = fitz.Matrix(zoom, zoom)
+            pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csRGB)
+            # pixmapのメモリをコピーせずに numpy 配列として参照する
+            # （アルファなしのRGBでレンダリングしているため、チャンネル数は常に3）
+            arr = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+            
+            if not _put_unless_stopped(out_queue, (page_number, pix, arr), stop_event):
+                return
+    except Exception as e:
+        _put_unless_stopped(out_queue, e, stop_event)
+        return
+    
+    _put_unless_stopped(out_queue, None, stop_event)
+
+
+def extract_pages_text_ocr(
+    pdf_path: Path,
+    page_numbers: List[int],
+    lang: str = 'jpn+eng',
+    preprocess: bool = False,
+    dpi: Optional[int] = None
+) -> List[str]:
+    """
+    OCR（tesserocr または pytesseract）を使用してPDFの複数ページからテキストを抽出
+    
+    レンダリングはバックグラウンドのスレッドで行い、メインスレッドでOCRを実行して
+    両者を並行させます。レンダリング済みで待機する画像は最大
+    _OCR_QUEUE_SIZE 枚に制限されます。
+    
+    Args:
+        pdf_path: PDFファイルのパス
+        page_numbers: ページ番号のリスト（1始まり）
+        lang: OCRで使用する言語（デフォルト: 'jpn+eng'）
+        preprocess: OCR前にOpenCVで二値化するかどうか
+        dpi: レンダリング解像度。Noneの場合はページサイズから自動決定（長辺 約1800px）
         
-        # pixmapをPIL Imageに変換
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    Returns:
+        ページごとの抽出テキストのリスト（page_numbers と同じ順序、Unicode NFC正規化済み）
         
-        # OCRでテキスト抽出
-        text = pytesseract.image_to_string(img, lang=lang)
+    Raises:
+        ValueError: ページ番号が範囲外の場合
+        ImportError: PyMuPDF、pytesseract、または（preprocess指定時に）OpenCV がインストールされていない場合
+        Exception: PDF読み込みやOCR処理に失敗した場合
+    """
+    _check_ocr_dependencies(preprocess)
+    
+    from PIL import Image
+    
+    try:
+        # （ドキュメントはキャッシュされるため、ここでは閉じない）
+        doc = _open_doc(str(pdf_path), pdf_path.stat().st_mtime_ns)
+        total_pages = len(doc)
         
-        # リソースを解放
-        doc.close()
+        # ページ番号の検証
+        for page_number in page_numbers:
+            if page_number < 1 or page_number > total_pages:
+                raise ValueError(
+                    f"ページ番号が範囲外です: {page_number} "
+                    f"(有効範囲: 1-{total_pages})"
+                )
         
-        if not text or not text.strip():
-            logging.warning(f"ページ {page_number} からOCRでテキストを抽出できませんでした")
-            return ""
+        logging.info(f"使用言語: {lang}")
         
-        # Unicode NFC正規化を適用
-        text = unicodedata.normalize('NFC', text)
+        # レンダリング（生産者スレッド）とOCR（このスレッド）をキューでつなぐ
+        rendered = queue.Queue(maxsize=_OCR_QUEUE_SIZE)
+        stop_event = threading.Event()
+        producer = threading.Thread(
+            target=_render_pages_for_ocr,
+            args=(doc, page_numbers, dpi, rendered, stop_event),
+            daemon=True
+        )
+        producer.start()
         
-        logging.info(f"OCRで {len(text)} 文字のテキストを抽出しました")
+        texts = []
+        try:
+            while True:
+                item = rendered.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                page_number, pix, arr = item
+                logging.info(f"{pdf_path} の {page_number} ページ目をOCRで解析中...")
+                
+                if preprocess:
+                    img = _preprocess_for_ocr(arr)
+                else:
+                    img = Image.fromarray(arr)
+                
+                text = _ocr_image(img, lang)
+                
+                if not text or not text.strip():
+                    logging.warning(f"ページ {page_number} からOCRでテキストを抽出できませんでした")
+                    texts.append("")
+                    continue
+                
+                # Unicode NFC正規化を適用
+                text = _normalize_nfc(text)
+                
+                logging.info(f"OCRで {len(text)} 文字のテキストを抽出しました")
+                texts.append(text)
+        finally:
+            stop_event.set()
+            producer.join()
         
-        return text
+        return texts
         
     except Exception as e:
         if isinstance(e, (ValueError, ImportError)):
@@ -279,7 +713,147 @@ def extract_page_text_ocr(pdf_path: Path, page_number: int, lang: str = 'jpn+eng
         raise
 
 
-def extract_page_text(pdf_path: Path, page_number: int, engine: str = 'pypdf') -> str:
+def extract_page_text_ocr(
+    pdf_path: Path,
+    page_number: int,
+    lang: str = 'jpn+eng',
+    preprocess: bool = False,
+    dpi: Optional[int] = None
+) -> str:
+    """
+    OCR（tesserocr または pytesseract）を使用してPDFの指定ページからテキストを抽出
+    
+    画像形式のPDF（テキスト層を持たないPDF）からテキストを抽出する際に使用します。
+    
+    Args:
+        pdf_path: PDFファイルのパス
+        page_number: ページ番号（1始まり）
+        lang: OCRで使用する言語（デフォルト: 'jpn+eng'）
+        preprocess: OCR前にOpenCVで二値化するかどうか
+        dpi: レンダリング解像度。Noneの場合はページサイズから自動決定（長辺 約1800px）
+        
+    Returns:
+        抽出されたテキスト（Unicode NFC正規化済み）
+        
+    Raises:
+        ValueError: ページ番号が範囲外の場合
+        ImportError: PyMuPDF、pytesseract、または（preprocess指定時に）OpenCV がインストールされていない場合
+        Exception: PDF読み込みやOCR処理に失敗した場合
+    """
+    return extract_pages_text_ocr(pdf_path, [page_number], lang, preprocess, dpi)[0]
+
+
+def _cache_file_path(pdf_path_str: str, mtime_ns: int, size: int, page_number: int, engine: str) -> Path:
+    """
+    抽出結果のキャッシュファイルのパスを生成
+    
+    PDFのパス・更新日時・サイズ・ページ番号・エンジン名をキーとするため、
+    PDFが更新された場合やエンジンが異なる場合は別のキャッシュになります。
+    """
+    key = f"{pdf_path_str}\0{mtime_ns}\0{size}\0{page_number}\0{engine}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return _CACHE_DIR / f"{digest}.txt"
+
+
+def cache_enabled_by_env() -> bool:
+    """環境変数 PDFTOTXT_CACHE で抽出結果のキャッシュが有効化されているか"""
+    return os.environ.get('PDFTOTXT_CACHE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _prune_cache_dir() -> None:
+    """ディスクキャッシュのエントリ数が上限を超えた場合、最後に使われた日時が古いものから削除"""
+    try:
+        with os.scandir(_CACHE_DIR) as entries:
+            cache_files = [
+                (entry.stat().st_mtime_ns, entry.path)
+                for entry in entries
+                if entry.name.endswith('.txt')
+            ]
+    except OSError:
+        return
+    
+    excess = len(cache_files) - _CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    
+    cache_files.sort()
+    for _, path in cache_files[:excess]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_extract_by_key(pdf_path_str: str, mtime_ns: int, size: int, page_number: int, engine: str) -> str:
+    """ディスクキャッシュを参照し、なければ抽出してキャッシュに保存"""
+    cache_file = _cache_file_path(pdf_path_str, mtime_ns, size, page_number, engine)
+    
+    try:
+        text = cache_file.read_bytes().decode('utf-8')
+    except (OSError, UnicodeDecodeError):
+        pass
+    else:
+        logging.info(f"キャッシュから抽出結果を読み込みました: {cache_file}")
+        # 更新日時を最終使用日時として扱う（古いエントリから削除するため）
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return text
+    
+    text = _TEXT_EXTRACTORS[engine](Path(pdf_path_str), page_number)
+    
+    # 一時ファイルに書き込んでから置き換える（他プロセスが書きかけを読まないように）
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(text.encode('utf-8'))
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logging.debug(f"キャッシュの書き込みに失敗しました: {e}")
+    else:
+        _prune_cache_dir()
+    
+    return text
+
+
+def _cached_extract(pdf_path: Path, page_number: int, engine: str) -> str:
+    """
+    キャッシュを利用して pypdf / pdfminer / pypdfium2 でテキストを抽出
+    
+    同一プロセス内ではメモリ上に、プロセス間ではディスク上にキャッシュします。
+    PDFの更新日時またはサイズが変わった場合は再抽出されます。
+    
+    Args:
+        pdf_path: PDFファイルのパス
+        page_number: ページ番号（1始まり）
+        engine: 抽出エンジン ('pypdf', 'pdfminer', または 'pypdfium2')
+        
+    Returns:
+        抽出されたテキスト（Unicode NFC正規化済み）
+    """
+    stat = pdf_path.stat()
+    hits = _cached_extract_by_key.cache_info().hits
+    text = _cached_extract_by_key(str(pdf_path), stat.st_mtime_ns, stat.st_size, page_number, engine)
+    if _cached_extract_by_key.cache_info().hits > hits:
+        logging.info(f"キャッシュ済みの抽出結果を使用します: {pdf_path} の {page_number} ページ目")
+    return text
+
+
+def extract_page_text(
+    pdf_path: Path,
+    page_number: int,
+    engine: str = 'pypdf',
+    ocr_preprocess: bool = False,
+    ocr_dpi: Optional[int] = None,
+    use_cache: bool = False
+) -> str:
     """
     PDFの指定ページからテキストを抽出（エンジン選択可能）
     
@@ -288,7 +862,10 @@ def extract_page_text(pdf_path: Path, page_number: int, engine: str = 'pypdf') -
     Args:
         pdf_path: PDFファイルのパス
         page_number: ページ番号（1始まり）
-        engine: 抽出エンジン ('pypdf', 'pdfminer', または 'ocr')
+        engine: 抽出エンジン ('pypdf', 'pdfminer', 'pypdfium2', または 'ocr')
+        ocr_preprocess: OCR実行時にOpenCVで二値化するかどうか
+        ocr_dpi: OCR時のレンダリング解像度。Noneの場合はページサイズから自動決定
+        use_cache: pypdf / pdfminer / pypdfium2 の抽出結果をキャッシュするかどうか
         
     Returns:
         抽出されたテキスト（Unicode NFC正規化済み）
@@ -299,25 +876,30 @@ def extract_page_text(pdf_path: Path, page_number: int, engine: str = 'pypdf') -
     """
     # OCRエンジンが明示的に指定された場合
     if engine == 'ocr':
-        return extract_page_text_ocr(pdf_path, page_number)
+        return extract_page_text_ocr(
+            pdf_path, page_number, preprocess=ocr_preprocess, dpi=ocr_dpi
+        )
     
-    # pypdf または pdfminer でテキスト抽出を試みる
-    if engine == 'pypdf':
-        text = extract_page_text_pypdf(pdf_path, page_number)
-    elif engine == 'pdfminer':
-        text = extract_page_text_pdfminer(pdf_path, page_number)
-    else:
+    # pypdf、pdfminer、または pypdfium2 でテキスト抽出を試みる
+    if engine not in _TEXT_EXTRACTORS:
         raise ValueError(
             f"無効な抽出エンジンです: {engine}\n"
-            f"有効なエンジン: 'pypdf', 'pdfminer', 'ocr'"
+            f"有効なエンジン: 'pypdf', 'pdfminer', 'pypdfium2', 'ocr'"
         )
     
+    if use_cache:
+        text = _cached_extract(pdf_path, page_number, engine)
+    else:
+        text = _TEXT_EXTRACTORS[engine](pdf_path, page_number)
+    
     # テキストが空の場合、OCRにフォールバック
     if not text or not text.strip():
-        if PYMUPDF_AVAILABLE and PYTESSERACT_AVAILABLE:
+        if PYMUPDF_AVAILABLE and OCR_AVAILABLE:
             logging.info("テキスト層が見つかりませんでした。OCRによる抽出を試みます...")
             try:
-                text = extract_page_text_ocr(pdf_path, page_number)
+                text = extract_page_text_ocr(
+                    pdf_path, page_number, preprocess=ocr_preprocess, dpi=ocr_dpi
+                )
                 if text and text.strip():
                     logging.info("OCRでテキストを抽出しました")
                 else:
@@ -330,7 +912,7 @@ def extract_page_text(pdf_path: Path, page_number: int, engine: str = 'pypdf') -
             missing_deps = []
             if not PYMUPDF_AVAILABLE:
                 missing_deps.append("PyMuPDF")
-            if not PYTESSERACT_AVAILABLE:
+            if not OCR_AVAILABLE:
                 missing_deps.append("pytesseract")
             
             logging.warning(
@@ -341,13 +923,20 @@ def extract_page_text(pdf_path: Path, page_number: int, engine: str = 'pypdf') -
     return text
 
 
-def generate_output_filename(pdf_path: Path, page_number: int) -> Path:
+def generate_output_filename(
+    pdf_path: Path,
+    page_number: int,
+    output_dir: Optional[Path] = None
+) -> Path:
     """
     出力ファイル名を生成
     
     Args:
         pdf_path: 元のPDFファイルのパス
         page_number: ページ番号
+        output_dir: 出力ディレクトリ。Noneの場合はカレントディレクトリ
+            （複数ページを処理する場合は事前に求めたディレクトリを渡すと、
+            ページごとのカレントディレクトリ取得を省略できます）
         
     Returns:
         出力ファイルのパス
@@ -356,10 +945,11 @@ def generate_output_filename(pdf_path: Path, page_number: int) -> Path:
     base_name = pdf_path.stem
     output_filename = f"{base_name}-{page_number}.txt"
     
-    # 実行場所（カレントディレクトリ）に出力
-    output_path = Path.cwd() / output_filename
+    # 指定がなければ実行場所（カレントディレクトリ）に出力
+    if output_dir is None:
+        output_dir = Path.cwd()
     
-    return output_path
+    return output_dir / output_filename
 
 
 def save_text_to_file(text: str, output_path: Path) -> None:
@@ -374,18 +964,23 @@ def save_text_to_file(text: str, output_path: Path) -> None:
         IOError: ファイルへの書き込みに失敗した場合
     """
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        # 一度にUTF-8へエンコードしてバイナリモードで書き込む
+        data = text.encode('utf-8')
+        with open(output_path, 'wb', buffering=65536) as f:
+            f.write(data)
         logging.info(f"出力ファイル: {output_path}")
     except Exception as e:
         logging.error(f"ファイルへの書き込みに失敗しました: {e}")
         raise
 
 
-def parse_arguments() -> argparse.Namespace:
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
     コマンドライン引数を解析
     
+    Args:
+        argv: 引数のリスト。Noneの場合は sys.argv[1:]
+        
     Returns:
         解析された引数
     """
@@ -397,6 +992,8 @@ def parse_arguments() -> argparse.Namespace:
   %(prog)s --pdf ./sample.pdf --page 3
   %(prog)s --pdf document.pdf --page 1
   %(prog)s --pdf accented.pdf --page 1 --engine pdfminer
+  %(prog)s --pdf large.pdf --page 10 --engine pypdfium2
+  %(prog)s --pdf large.pdf --page 10 --cache
         """
     )
     
@@ -419,19 +1016,41 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         '--engine',
         type=str,
-        choices=['pypdf', 'pdfminer', 'ocr'],
+        choices=[*_TEXT_EXTRACTORS, 'ocr'],
         default='pypdf',
-        help='テキスト抽出エンジン（デフォルト: pypdf）。文字化けが発生する場合は pdfminer を試してください。画像PDFの場合は ocr を使用してください。',
+        help='テキスト抽出エンジン（デフォルト: pypdf）。文字化けが発生する場合は pdfminer を試してください。速度を優先する場合は pypdfium2 を使用してください。画像PDFの場合は ocr を使用してください。',
         metavar='<エンジン>'
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        '--ocr-preprocess',
+        action='store_true',
+        help='OCR前にOpenCVでグレースケール化・二値化を行う（要 opencv-python-headless）。文書によっては精度が下がる場合があります。'
+    )
+    
+    parser.add_argument(
+        '--ocr-dpi',
+        type=int,
+        help='OCR時のレンダリング解像度（DPI）。指定しない場合はページの長辺が約1800pxになるよう自動決定',
+        metavar='<DPI>'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='抽出結果をディスクにキャッシュし、同じPDF・ページの再抽出時に再利用する（環境変数 PDFTOTXT_CACHE=1 でも有効化）'
+    )
+    
+    return parser.parse_args(argv)
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """
     メイン処理
     
+    Args:
+        argv: コマンドライン引数のリスト。Noneの場合は sys.argv[1:]
+        
     Returns:
         終了コード（0: 成功、非0: エラー）
     """
@@ -439,7 +1058,7 @@ def main() -> int:
     
     try:
         # 引数解析
-        args = parse_arguments()
+        args = parse_arguments(argv)
         
         logging.info("テキスト抽出を開始します...")
         
@@ -457,6 +1076,21 @@ def main() -> int:
             )
             return 1
         
+        if engine == 'pypdfium2' and not PDFIUM_AVAILABLE:
+            logging.error(
+                "pypdfium2 エンジンが選択されましたが、pypdfium2 がインストールされていません。\n"
+                "pip install pypdfium2 を実行してインストールするか、\n"
+                "デフォルトの pypdf エンジンを使用してください（--engine pypdf または引数省略）。"
+            )
+            return 1
+        
+        if args.ocr_preprocess and not CV2_AVAILABLE:
+            logging.error(
+                "--ocr-preprocess が指定されましたが、OpenCV がインストールされていません。\n"
+                "pip install opencv-python-headless を実行してインストールしてください。"
+            )
+            return 1
+        
         logging.info(f"使用する抽出エンジン: {engine}")
         
         # ページ番号の基本検証
@@ -464,11 +1098,19 @@ def main() -> int:
             logging.error(f"ページ番号は1以上である必要があります: {page_number}")
             return 1
         
+        # OCR解像度の検証
+        if args.ocr_dpi is not None and args.ocr_dpi < 1:
+            logging.error(f"OCRの解像度は1以上である必要があります: {args.ocr_dpi}")
+            return 1
+        
         # PDFファイルの検証
         validate_pdf_file(pdf_path)
         
         # テキスト抽出
-        text = extract_page_text(pdf_path, page_number, engine)
+        text = extract_page_text(
+            pdf_path, page_number, engine, args.ocr_preprocess, args.ocr_dpi,
+            use_cache=args.cache or cache_enabled_by_env()
+        )
         
         # 出力ファイル名生成
         output_path = generate_output_filename(pdf_path, page_number)
@@ -502,6 +1144,10 @@ def main() -> int:
     except Exception as e:
         logging.error(f"予期しないエラーが発生しました: {e}")
         return 1
+    
+    finally:
+        # キャッシュしたドキュメントを解放（同一プロセスで main を繰り返し呼ぶ場合に備える）
+        _close_all_docs()
 
 
 if __name__ == '__main__':
@@ -7,8 +7,10 @@ PDF ページを画像に変換する CLI ツール
 """
 
 import argparse
+import os
 import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 
@@ -36,10 +38,12 @@ def setup_logging():
     stderr_handler = logging.StreamHandler(sys.stderr)
     stderr_handler.setLevel(logging.ERROR)
     
+    # main() が同一プロセスで繰り返し呼ばれても、その時点の標準出力・標準エラー出力を使うよう再設定
     logging.basicConfig(
         level=logging.INFO,
         format='%(levelname)s: %(message)s',
-        handlers=[stdout_handler, stderr_handler]
+        handlers=[stdout_handler, stderr_handler],
+        force=True
     )
 
 
@@ -64,12 +68,59 @@ def validate_pdf_file(pdf_path: Path) -> None:
         logging.warning(f"ファイル拡張子が .pdf ではありません: {pdf_path}")
 
 
+def _render_page(
+    pdf_path_str: str,
+    page_num: int,
+    zoom: float,
+    image_format: str,
+    output_path_str: str,
+    grayscale: bool = False
+) -> str:
+    """
+    1ページを画像にレンダリングして保存（ワーカープロセス用）
+    
+    PyMuPDF の Document はプロセス間で共有できないため、
+    ワーカーごとにPDFを開き直します。
+    
+    Args:
+        pdf_path_str: PDFファイルのパス
+        page_num: ページ番号（0始まり）
+        zoom: ズーム倍率（dpi/72）
+        image_format: 画像フォーマット ('png' または 'jpeg')
+        output_path_str: 出力画像ファイルのパス
+        grayscale: True の場合、1チャンネルのグレースケールでレンダリング
+        
+    Returns:
+        保存した画像ファイルのパス
+    """
+    doc = fitz.open(pdf_path_str)
+    try:
+        page = doc[page_num]
+        mat = fitz.Matrix(zoom, zoom)
+        
+        # ページを画像（pixmap）にレンダリング（アルファなしのRGBまたはグレースケール）
+        colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+        pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=colorspace)
+        
+        # 画像を保存
+        if image_format.lower() == 'png':
+            pix.save(output_path_str)
+        elif image_format.lower() in ['jpg', 'jpeg']:
+            # JPEGの場合、PyMuPDFで直接エンコード（Pillowを経由しない）
+            Path(output_path_str).write_bytes(pix.tobytes("jpeg", jpg_quality=95))
+    finally:
+        doc.close()
+    
+    return output_path_str
+
+
 def convert_pdf_to_images(
     pdf_path: Path,
     output_dir: Path,
     image_format: str = 'png',
     dpi: int = 150,
-    page_range: Optional[tuple] = None
+    page_range: Optional[tuple] = None,
+    grayscale: bool = False
 ) -> List[Path]:
     """
     PDFの各ページを画像ファイルに変換
@@ -80,6 +131,7 @@ def convert_pdf_to_images(
         image_format: 画像フォーマット ('png' または 'jpeg')
         dpi: 解像度（DPI）
         page_range: ページ範囲のタプル (開始, 終了)。Noneの場合は全ページ
+        grayscale: True の場合、グレースケール画像として保存（RGBの1/3のデータ量）
         
     Returns:
         変換された画像ファイルのパスのリスト
@@ -91,8 +143,9 @@ def convert_pdf_to_images(
     image_paths = []
     
     try:
-        doc = fitz.open(str(pdf_path))
-        total_pages = len(doc)
+        # ページ数の取得のみ（レンダリングはワーカープロセスがそれぞれPDFを開いて行う）
+        with fitz.open(str(pdf_path)) as doc:
+            total_pages = len(doc)
         
         logging.info(f"PDF総ページ数: {total_pages}")
         
@@ -107,34 +160,34 @@ def convert_pdf_to_images(
         
         logging.info(f"変換範囲: ページ {start_page + 1} から {end_page}")
         
-        # 各ページを画像に変換
-        for page_num in range(start_page, end_page):
-            page = doc[page_num]
-            
-            # 解像度の設定（dpi/72でズーム倍率を計算）
-            zoom = dpi / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # ページを画像（pixmap）にレンダリング
-            pix = page.get_pixmap(matrix=mat)
-            
-            # 出力ファイル名を生成
-            base_name = pdf_path.stem
-            output_filename = f"{base_name}-page{page_num + 1}.{image_format}"
-            output_path = output_dir / output_filename
-            
-            # 画像を保存
-            if image_format.lower() == 'png':
-                pix.save(str(output_path))
-            elif image_format.lower() in ['jpg', 'jpeg']:
-                # JPEGの場合、Pillowを使用してRGBモードで保存
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                img.save(str(output_path), "JPEG", quality=95)
-            
-            image_paths.append(output_path)
-            logging.info(f"ページ {page_num + 1} を保存: {output_path}")
+        # 解像度の設定（dpi/72でズーム倍率を計算）
+        zoom = dpi / 72.0
+        
+        # 出力ファイル名を事前に生成
+        base_name = pdf_path.stem
+        pages = list(range(start_page, end_page))
+        output_paths = [
+            str(output_dir / f"{base_name}-page{page_num + 1}.{image_format}")
+            for page_num in pages
+        ]
+        
+        # 各ページを並列に画像に変換（ワーカー数は過剰な並列化を避けるため4まで）
+        max_workers = min(os.cpu_count() or 1, 4, max(len(pages), 1))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _render_page,
+                [str(pdf_path)] * len(pages),
+                pages,
+                [zoom] * len(pages),
+                [image_format] * len(pages),
+                output_paths,
+                [grayscale] * len(pages)
+            )
+            for page_num, output_path_str in zip(pages, results):
+                output_path = Path(output_path_str)
+                image_paths.append(output_path)
+                logging.info(f"ページ {page_num + 1} を保存: {output_path}")
         
-        doc.close()
         logging.info(f"合計 {len(image_paths)} ページを変換しました")
         
         return image_paths
@@ -161,35 +214,26 @@ def images_to_pdf(image_paths: List[Path], output_pdf_path: Path) -> None:
         
         logging.info(f"{len(image_paths)} 枚の画像をPDFに変換中...")
         
-        # 最初の画像を開く
-        images = []
-        first_image = Image.open(str(image_paths[0]))
-        
-        # 残りの画像を開く
-        for img_path in image_paths[1:]:
-            img = Image.open(str(img_path))
-            # RGBモードに変換（PDFはRGBが必要）
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-        
-        # 最初の画像もRGBモードに変換
-        if first_image.mode != 'RGB':
-            first_image = first_image.convert('RGB')
-        
-        # PDFとして保存
-        first_image.save(
-            str(output_pdf_path),
-            "PDF",
-            save_all=True,
-            append_images=images,
-            resolution=150.0
-        )
-        
-        # 画像を閉じる
-        first_image.close()
-        for img in images:
-            img.close()
+        # 1ページずつ画像をPDFに埋め込む
+        # （全画像をデコードしてメモリに保持しないよう、Pillow の save_all は使用しない）
+        resolution = 150.0
+        pdf = fitz.open()
+        try:
+            for img_path in image_paths:
+                # Image.open はヘッダのみ読み込むため、画素はデコードされない
+                with Image.open(str(img_path)) as img:
+                    width, height = img.size
+                
+                page = pdf.new_page(
+                    width=width * 72.0 / resolution,
+                    height=height * 72.0 / resolution
+                )
+                page.insert_image(page.rect, filename=str(img_path))
+            
+            # PDFとして保存
+            pdf.save(str(output_pdf_path), deflate=True)
+        finally:
+            pdf.close()
         
         logging.info(f"画像PDFを作成しました: {output_pdf_path}")
         
@@ -198,10 +242,13 @@ def images_to_pdf(image_paths: List[Path], output_pdf_path: Path) -> None:
         raise
 
 
-def parse_arguments() -> argparse.Namespace:
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
     コマンドライン引数を解析
     
+    Args:
+        argv: 引数のリスト。Noneの場合は sys.argv[1:]
+        
     Returns:
         解析された引数
     """
@@ -221,6 +268,9 @@ def parse_arguments() -> argparse.Namespace:
 
   # 特定のページ範囲のみ変換（3ページ目から5ページ目）
   %(prog)s --pdf sample.pdf --output-dir ./images --pages 3 5
+
+  # グレースケールで変換（OCR用の画像PDFを作成する場合など）
+  %(prog)s --pdf sample.pdf --output-dir ./images --create-pdf --grayscale
         """
     )
     
@@ -265,6 +315,12 @@ def parse_arguments() -> argparse.Namespace:
         metavar=('開始ページ', '終了ページ')
     )
     
+    parser.add_argument(
+        '--grayscale',
+        action='store_true',
+        help='グレースケール画像として保存する（データ量を削減し、OCR処理を高速化）'
+    )
+    
     parser.add_argument(
         '--create-pdf',
         action='store_true',
@@ -278,13 +334,16 @@ def parse_arguments() -> argparse.Namespace:
         metavar='<出力PDFパス>'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """
     メイン処理
     
+    Args:
+        argv: コマンドライン引数のリスト。Noneの場合は sys.argv[1:]
+        
     Returns:
         終了コード（0: 成功、非0: エラー）
     """
@@ -292,7 +351,7 @@ def main() -> int:
     
     try:
         # 引数解析
-        args = parse_arguments()
+        args = parse_arguments(argv)
         
         logging.info("PDF画像変換を開始します...")
         
@@ -328,7 +387,8 @@ def main() -> int:
             output_dir,
             image_format,
             args.dpi,
-            page_range
+            page_range,
+            args.grayscale
         )
         
         # オプション: 画像をPDFに結合
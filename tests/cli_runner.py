@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+テスト用ヘルパー: CLIの main() をプロセス内で実行する
+
+subprocess.run で新しいPythonインタプリタを起動する代わりに使用し、
+インタプリタの起動とライブラリの再インポートにかかる時間を省略します。
+"""
+
+import contextlib
+import io
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+
+
+class _NullWriter(io.TextIOBase):
+    """書き込まれた内容を破棄するテキストストリーム（subprocess.DEVNULL 相当）"""
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+def run_cli(
+    module,
+    args: List[str],
+    cwd: Optional[Path] = None,
+    capture_stdout: bool = True
+) -> SimpleNamespace:
+    """
+    CLIモジュールの main() をプロセス内で実行
+    
+    Args:
+        module: main(argv) を持つCLIモジュール（pdf_page_text または pdf_to_image）
+        args: コマンドライン引数のリスト
+        cwd: 実行時のカレントディレクトリ。Noneの場合は変更しない
+        capture_stdout: False の場合、標準出力（ページごとの進捗ログなど）を
+            保持せずに破棄し、結果の stdout は None になる
+        
+    Returns:
+        subprocess.run の結果と同様に returncode, stdout, stderr を持つオブジェクト
+    """
+    stdout = io.StringIO() if capture_stdout else _NullWriter()
+    stderr = io.StringIO()
+    original_cwd = os.getcwd()
+    
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+        
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                returncode = module.main(args)
+            except SystemExit as e:
+                # --help や引数エラーの場合、argparse は SystemExit を送出する
+                returncode = 0 if e.code is None else e.code
+    finally:
+        os.chdir(original_cwd)
+    
+    return SimpleNamespace(
+        returncode=returncode,
+        stdout=stdout.getvalue() if capture_stdout else None,
+        stderr=stderr.getvalue()
+    )
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+pytest 共通フィクスチャ
+
+テスト用PDFは reportlab でセッションごとに1回だけメモリ上に生成し、
+各テストにはそのバイト列を一時ディレクトリ（tmp_path）に書き出して渡します。
+"""
+
+import io
+import sys
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+
+# 親ディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 日本語テキスト付きPDFに描画するテキスト
+JAPANESE_TEXT = "これはテストページです"
+OCR_TEXT = "これはテストです"
+
+# 日本語フォント（HeiseiMin-W3）を reportlab に登録済みかどうか
+_JP_FONT_READY = False
+
+
+@pytest.fixture(autouse=True)
+def _isolate_extraction_cache(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    抽出結果のディスクキャッシュの保存先を一時ディレクトリに差し替える
+    
+    _CACHE_DIR はインポート時に決まるため、環境変数ではなくモジュール属性を差し替える。
+    """
+    import pdf_page_text
+    
+    monkeypatch.setattr(pdf_page_text, "_CACHE_DIR", tmp_path_factory.mktemp("pdftotxt-cache"))
+    monkeypatch.delenv("PDFTOTXT_CACHE", raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _limit_tesseract_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tesseract の OpenMP スレッド数を1に制限
+    
+    テストで扱う1ページの小さな画像では、スレッドの起動・同期のコストが
+    認識処理そのものより大きくなり、かえって遅くなるため。
+    pytesseract が起動するサブプロセスにも環境変数として引き継がれる。
+    """
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "1")
+
+
+def _new_canvas():
+    """BytesIO に出力する reportlab のキャンバスを作成"""
+    pytest.importorskip("reportlab")
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    
+    buf = io.BytesIO()
+    return buf, canvas.Canvas(buf, pagesize=A4)
+
+
+def _ensure_jp_font() -> None:
+    """日本語フォントを reportlab に登録（CIDフォントの読み込みはプロセスごとに1回だけ行う）"""
+    global _JP_FONT_READY
+    if _JP_FONT_READY:
+        return
+    
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    
+    pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))
+    _JP_FONT_READY = True
+
+
+def _render_japanese_pdf(text: str, font_size: int) -> bytes:
+    """日本語テキストを1行描画した1ページのPDFを生成"""
+    buf, c = _new_canvas()
+    _ensure_jp_font()
+    
+    c.setFont('HeiseiMin-W3', font_size)
+    c.drawString(100, 750, text)
+    c.showPage()
+    c.save()
+    
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="session")
+def sample_pdf_bytes() -> bytes:
+    """3ページのテスト用PDF（バイト列）"""
+    buf, c = _new_canvas()
+    
+    for page in range(1, 4):
+        c.drawString(100, 750, f"Test Page {page}")
+        c.drawString(100, 700, f"これはテストページ{page}です")
+        c.showPage()
+    
+    c.save()
+    
+    return buf.getvalue()
+
+
+@pytest.fixture
+def sample_pdf(tmp_path: Path, sample_pdf_bytes: bytes) -> Path:
+    """3ページのテスト用PDFを tmp_path/test.pdf に書き出す"""
+    pdf_path = tmp_path / "test.pdf"
+    pdf_path.write_bytes(sample_pdf_bytes)
+    return pdf_path
+
+
+@pytest.fixture(scope="session")
+def japanese_pdf_bytes() -> bytes:
+    """日本語テキスト付きPDF（バイト列、12pt）"""
+    return _render_japanese_pdf(JAPANESE_TEXT, 12)
+
+
+@pytest.fixture
+def japanese_pdf(tmp_path: Path, japanese_pdf_bytes: bytes) -> Tuple[Path, str]:
+    """日本語テキスト付きPDFを tmp_path/original.pdf に書き出し、パスと元のテキストを返す"""
+    pdf_path = tmp_path / "original.pdf"
+    pdf_path.write_bytes(japanese_pdf_bytes)
+    return pdf_path, JAPANESE_TEXT
+
+
+@pytest.fixture(scope="session")
+def ocr_pdf_bytes() -> bytes:
+    """OCRテスト用の日本語テキスト付きPDF（バイト列、OCRしやすいよう24pt）"""
+    return _render_japanese_pdf(OCR_TEXT, 24)
+
+
+@pytest.fixture(scope="session")
+def image_pdf(tmp_path_factory: pytest.TempPathFactory, ocr_pdf_bytes: bytes) -> Tuple[Path, str]:
+    """
+    OCRテスト用PDFを画像PDFに変換し、画像PDFのパスと元のテキストを返す
+    
+    変換はセッションごとに1回だけ行い、OCRテスト間で共有する（読み取り専用で使用すること）。
+    """
+    import pdf_to_image
+    from cli_runner import run_cli
+    
+    tmpdir_path = tmp_path_factory.mktemp("image_pdf")
+    original_pdf = tmpdir_path / "original.pdf"
+    original_pdf.write_bytes(ocr_pdf_bytes)
+    output_pdf = tmpdir_path / "image_based.pdf"
+    
+    result = run_cli(
+        pdf_to_image,
+        ["--pdf", str(original_pdf),
+         "--output-dir", str(tmpdir_path / "images"),
+         "--create-pdf",
+         "--output-pdf", str(output_pdf),
+         # 24ptのテキストなら200dpiで十分に認識できる。OCRの処理時間は画素数に
+         # ほぼ比例するため、300dpiより画素数を約44%に抑え、グレースケールで
+         # データ量も1/3にする
+         "--dpi", "200",
+         "--grayscale"],
+        capture_stdout=False
+    )
+    assert result.returncode == 0, f"画像変換失敗: {result.stderr}"
+    assert output_pdf.exists(), "画像PDFが作成されませんでした"
+    
+    return output_pdf, OCR_TEXT
@@ -6,217 +6,110 @@
 正しく抽出されることを確認します。
 """
 
+import io
 import sys
-import subprocess
 from pathlib import Path
 
+import pytest
+
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from pdf_page_text import extract_page_text, generate_output_filename, save_text_to_file
 
-def create_test_pdf_with_accents():
-    """アキュート記号付き文字とアポストロフィを含むテストPDFを作成"""
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        
-        test_pdf_path = Path(__file__).parent / "test_accented.pdf"
-        
-        c = canvas.Canvas(str(test_pdf_path), pagesize=A4)
-        
-        # テスト対象の文字列（受け入れ基準より）
-        test_strings = [
-            "café résumé jalapeño piñata",
-            "l'été naïve coöperate l'œuvre",
-            "São Gödel",
-            "it's l'heure rock 'n' roll",
-        ]
-        
-        # テキストを描画
-        y_position = 750
-        for text in test_strings:
-            c.drawString(100, y_position, text)
-            y_position -= 30
-        
-        c.showPage()
-        c.save()
-        
-        return test_pdf_path
-        
-    except ImportError:
-        print("⚠ reportlab がインストールされていないため、テストをスキップしました")
-        return None
-
-
-def test_pypdf_engine():
-    """pypdf エンジンでアキュート記号付き文字が正しく抽出されることを確認"""
-    test_pdf_path = create_test_pdf_with_accents()
-    if test_pdf_path is None:
-        return
+
+def run_extraction(pdf_path: Path, engine: str = 'pypdf') -> Path:
+    """pdf_page_text.py と同じ手順でテキストを抽出・保存し、出力ファイルのパスを返す"""
+    text = extract_page_text(pdf_path, 1, engine)
+    output_path = generate_output_filename(pdf_path, 1, pdf_path.parent)
+    save_text_to_file(text, output_path)
+    return output_path
+
+
+def create_test_pdf_with_accents(tmp_path: Path) -> Path:
+    """アキュート記号付き文字とアポストロフィを含むテストPDFを tmp_path に作成"""
+    pytest.importorskip("reportlab")
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
     
-    try:
-        # pypdf エンジンでテキストを抽出
-        result = subprocess.run(
-            ["python", "pdf_page_text.py", "--pdf", str(test_pdf_path), "--page", "1", "--engine", "pypdf"],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
-        
-        assert result.returncode == 0, f"終了コードが0ではありません: {result.returncode}"
-        
-        # 出力ファイルを確認
-        output_file = Path(__file__).parent.parent / "test_accented-1.txt"
-        assert output_file.exists(), f"出力ファイルが作成されませんでした: {output_file}"
-        
-        # 出力ファイルの内容を確認
-        with open(output_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 置換文字（�）が含まれていないことを確認
-        assert '�' not in content, "置換文字（�）が出力に含まれています"
-        
-        # テスト文字列が含まれていることを確認（一部）
-        test_words = ['café', 'résumé', 'jalapeño', 'piñata', "l'été", 'naïve', 'São', 'Gödel']
-        found_words = []
-        missing_words = []
-        
-        for word in test_words:
-            if word in content:
-                found_words.append(word)
-            else:
-                missing_words.append(word)
-        
-        # クリーンアップ
-        output_file.unlink()
-        
-        print(f"✓ pypdf エンジンのテスト成功")
-        print(f"  正しく抽出された単語: {', '.join(found_words)}")
-        if missing_words:
-            print(f"  ⚠ 抽出されなかった単語（PDF生成の問題の可能性）: {', '.join(missing_words)}")
-        
-    finally:
-        # テストPDFをクリーンアップ
-        if test_pdf_path and test_pdf_path.exists():
-            test_pdf_path.unlink()
-
-
-def test_pdfminer_engine():
-    """pdfminer エンジンでアキュート記号付き文字が正しく抽出されることを確認"""
-    test_pdf_path = create_test_pdf_with_accents()
-    if test_pdf_path is None:
-        return
+    test_pdf_path = tmp_path / "test_accented.pdf"
     
-    try:
-        # pdfminer.six が利用可能かチェック
-        try:
-            import pdfminer
-        except ImportError:
-            print("⚠ pdfminer.six がインストールされていないため、pdfminer エンジンのテストをスキップしました")
-            return
-        
-        # pdfminer エンジンでテキストを抽出
-        result = subprocess.run(
-            ["python", "pdf_page_text.py", "--pdf", str(test_pdf_path), "--page", "1", "--engine", "pdfminer"],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
-        
-        assert result.returncode == 0, f"終了コードが0ではありません: {result.returncode}"
-        
-        # 出力ファイルを確認
-        output_file = Path(__file__).parent.parent / "test_accented-1.txt"
-        assert output_file.exists(), f"出力ファイルが作成されませんでした: {output_file}"
-        
-        # 出力ファイルの内容を確認
-        with open(output_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 置換文字（�）が含まれていないことを確認
-        assert '�' not in content, "置換文字（�）が出力に含まれています"
-        
-        # テスト文字列が含まれていることを確認（一部）
-        test_words = ['café', 'résumé', 'jalapeño', 'piñata', "l'été", 'naïve', 'São', 'Gödel']
-        found_words = []
-        missing_words = []
-        
-        for word in test_words:
-            if word in content:
-                found_words.append(word)
-            else:
-                missing_words.append(word)
-        
-        # クリーンアップ
-        output_file.unlink()
-        
-        print(f"✓ pdfminer エンジンのテスト成功")
-        print(f"  正しく抽出された単語: {', '.join(found_words)}")
-        if missing_words:
-            print(f"  ⚠ 抽出されなかった単語（PDF生成の問題の可能性）: {', '.join(missing_words)}")
-        
-    finally:
-        # テストPDFをクリーンアップ
-        if test_pdf_path and test_pdf_path.exists():
-            test_pdf_path.unlink()
-
-
-def test_output_encoding():
+    # メモリ上に生成してから1回で書き出す
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    
+    # テスト対象の文字列（受け入れ基準より）
+    test_strings = [
+        "café résumé jalapeño piñata",
+        "l'été naïve coöperate l'œuvre",
+        "São Gödel",
+        "it's l'heure rock 'n' roll",
+    ]
+    
+    # テキストを描画
+    y_position = 750
+    for text in test_strings:
+        c.drawString(100, y_position, text)
+        y_position -= 30
+    
+    c.showPage()
+    c.save()
+    test_pdf_path.write_bytes(buf.getvalue())
+    
+    return test_pdf_path
+
+
+# 抽出結果に含まれるべき単語
+EXPECTED_WORDS = ['café', 'résumé', 'jalapeño', 'piñata', "l'été", 'naïve', 'São', 'Gödel']
+
+
+@pytest.mark.parametrize("engine", ['pypdf', 'pdfminer', 'pypdfium2'])
+def test_engine_extracts_accented_chars(engine: str, tmp_path: Path):
+    """各エンジンでアキュート記号付き文字が正しく抽出されることを確認"""
+    # エンジン名と同名のモジュールがインストールされていない場合はスキップ
+    pytest.importorskip(engine)
+    
+    test_pdf_path = create_test_pdf_with_accents(tmp_path)
+    
+    # 指定エンジンでテキストを抽出
+    output_file = run_extraction(test_pdf_path, engine)
+    
+    # 出力ファイルを確認
+    assert output_file.exists(), f"出力ファイルが作成されませんでした: {output_file}"
+    
+    # 出力ファイルの内容を確認
+    with open(output_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # 置換文字（�）が含まれていないことを確認
+    assert '�' not in content, "置換文字（�）が出力に含まれています"
+    
+    # テスト文字列が含まれていることを確認
+    missing_words = [word for word in EXPECTED_WORDS if word not in content]
+    assert not missing_words, f"{engine} エンジンで抽出されなかった単語: {', '.join(missing_words)}"
+    
+    print(f"✓ {engine} エンジンのテスト成功")
+
+
+def test_output_encoding(tmp_path: Path):
     """出力ファイルがUTF-8エンコーディングであることを確認"""
-    test_pdf_path = create_test_pdf_with_accents()
-    if test_pdf_path is None:
-        return
+    test_pdf_path = create_test_pdf_with_accents(tmp_path)
+    
+    # テキストを抽出
+    output_file = run_extraction(test_pdf_path)
+    
+    # 出力ファイルを確認
+    assert output_file.exists()
     
+    # UTF-8としてファイルを読み込めることを確認
     try:
-        # テキストを抽出
-        result = subprocess.run(
-            ["python", "pdf_page_text.py", "--pdf", str(test_pdf_path), "--page", "1"],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
-        
-        assert result.returncode == 0
-        
-        # 出力ファイルを確認
-        output_file = Path(__file__).parent.parent / "test_accented-1.txt"
-        assert output_file.exists()
-        
-        # UTF-8としてファイルを読み込めることを確認
-        try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            print("✓ 出力ファイルのUTF-8エンコーディングテスト成功")
-        except UnicodeDecodeError:
-            raise AssertionError("出力ファイルがUTF-8でエンコードされていません")
-        finally:
-            # クリーンアップ
-            output_file.unlink()
-        
-    finally:
-        # テストPDFをクリーンアップ
-        if test_pdf_path and test_pdf_path.exists():
-            test_pdf_path.unlink()
+        with open(output_file, 'r', encoding='utf-8') as f:
+            f.read()
+    except UnicodeDecodeError:
+        raise AssertionError("出力ファイルがUTF-8でエンコードされていません")
+    
+    print("✓ 出力ファイルのUTF-8エンコーディングテスト成功")
 
 
 if __name__ == "__main__":
-    print("=== アキュート記号付き文字とアポストロフィのテスト ===\n")
-    
-    try:
-        test_pypdf_engine()
-        test_pdfminer_engine()
-        test_output_encoding()
-        
-        print("\n=== すべてのテストが成功しました ===")
-        sys.exit(0)
-        
-    except AssertionError as e:
-        print(f"\n✗ テスト失敗: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n✗ テスト実行エラー: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
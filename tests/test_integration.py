@@ -6,40 +6,18 @@ pdf_to_image.py と pdf_page_text.py の統合動作を確認
 """
 
 import sys
-import subprocess
 from pathlib import Path
-import tempfile
+from typing import Tuple
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import pdf_page_text
+import pdf_to_image
+from cli_runner import run_cli
 
-def create_test_pdf_with_text(pdf_path: Path) -> str:
-    """テスト用のテキスト付きPDFを作成し、元のテキストを返す"""
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-        
-        # 日本語フォントを登録
-        pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))
-        
-        test_text = "これはテストページです"
-        
-        c = canvas.Canvas(str(pdf_path), pagesize=A4)
-        c.setFont('HeiseiMin-W3', 12)
-        c.drawString(100, 750, test_text)
-        c.showPage()
-        c.save()
-        
-        return test_text
-        
-    except ImportError:
-        raise ImportError("reportlab がインストールされていません")
 
-
-def test_full_workflow():
+def test_full_workflow(japanese_pdf: Tuple[Path, str]):
     """
     完全なワークフローをテスト:
     1. テキストPDFを作成
@@ -48,99 +26,73 @@ def test_full_workflow():
     4. 元のテキストPDFからテキスト抽出
     5. 画像PDFからテキスト抽出（空のはず）
     """
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            
-            # 1. テキストPDFを作成
-            original_pdf = tmpdir_path / "original.pdf"
-            expected_text = create_test_pdf_with_text(original_pdf)
-            print(f"✓ テキストPDFを作成: {original_pdf}")
-            
-            # 2. PDFを画像に変換して、画像PDFを作成
-            images_dir = tmpdir_path / "images"
-            image_pdf = tmpdir_path / "image_based.pdf"
-            
-            result = subprocess.run(
-                ["python", "pdf_to_image.py",
-                 "--pdf", str(original_pdf),
-                 "--output-dir", str(images_dir),
-                 "--create-pdf",
-                 "--output-pdf", str(image_pdf)],
-                cwd=Path(__file__).parent.parent,
-                capture_output=True,
-                text=True
-            )
-            
-            assert result.returncode == 0, f"画像変換失敗: {result.stderr}"
-            assert image_pdf.exists(), "画像PDFが作成されませんでした"
-            print(f"✓ 画像PDFを作成: {image_pdf}")
-            
-            # 3. 元のテキストPDFからテキスト抽出
-            original_text_file = tmpdir_path / "original-1.txt"
-            result = subprocess.run(
-                ["python", str(Path(__file__).parent.parent / "pdf_page_text.py"),
-                 "--pdf", str(original_pdf),
-                 "--page", "1"],
-                cwd=tmpdir_path,
-                capture_output=True,
-                text=True
-            )
-            
-            assert result.returncode == 0, f"テキスト抽出失敗: {result.stderr}"
-            assert original_text_file.exists(), "テキストファイルが作成されませんでした"
-            
-            with open(original_text_file, 'r', encoding='utf-8') as f:
-                extracted_text = f.read()
-            
-            # テキストが含まれていることを確認
-            assert expected_text in extracted_text, \
-                f"期待されるテキストが見つかりません。期待: '{expected_text}', 実際: '{extracted_text}'"
-            print(f"✓ 元のPDFからテキスト抽出成功: '{extracted_text.strip()}'")
-            
-            # 4. 画像PDFからテキスト抽出（空または抽出不可のはず）
-            image_text_file = tmpdir_path / "image_based-1.txt"
-            result = subprocess.run(
-                ["python", str(Path(__file__).parent.parent / "pdf_page_text.py"),
-                 "--pdf", str(image_pdf),
-                 "--page", "1"],
-                cwd=tmpdir_path,
-                capture_output=True,
-                text=True
-            )
-            
-            assert result.returncode == 0, f"画像PDFからのテキスト抽出失敗: {result.stderr}"
-            
-            with open(image_text_file, 'r', encoding='utf-8') as f:
-                image_extracted_text = f.read()
-            
-            # 画像PDFからはテキストが抽出できない（または空）ことを確認
-            # これは画像化されたため、テキストレイヤーが存在しないことを示す
-            print(f"✓ 画像PDFからのテキスト抽出結果: '{image_extracted_text.strip()}' (空またはほぼ空のはず)")
-            
-            # 統合テストの目的を達成: テキストPDFと画像PDFでテキスト抽出結果が異なることを確認
-            print("\n=== 統合テスト成功 ===")
-            print(f"元のテキストPDF: テキストあり ('{extracted_text.strip()}')")
-            print(f"画像PDF: テキストなし/限定的 ('{image_extracted_text.strip()}')")
-            print("→ PDF画像化機能が正常に動作し、テキストレイヤーが除去されました")
-            
-    except ImportError:
-        print("⚠ reportlab がインストールされていないため、テストをスキップしました")
+    # 1. テキストPDF（conftest.py の japanese_pdf フィクスチャで tmp_path に作成済み）
+    original_pdf, expected_text = japanese_pdf
+    tmpdir_path = original_pdf.parent
+    print(f"✓ テキストPDFを作成: {original_pdf}")
+    
+    # 2. PDFを画像に変換して、画像PDFを作成
+    images_dir = tmpdir_path / "images"
+    image_pdf = tmpdir_path / "image_based.pdf"
+    
+    result = run_cli(
+        pdf_to_image,
+        ["--pdf", str(original_pdf),
+         "--output-dir", str(images_dir),
+         "--create-pdf",
+         "--output-pdf", str(image_pdf)]
+    )
+    
+    assert result.returncode == 0, f"画像変換失敗: {result.stderr}"
+    assert image_pdf.exists(), "画像PDFが作成されませんでした"
+    print(f"✓ 画像PDFを作成: {image_pdf}")
+    
+    # 3. 元のテキストPDFからテキスト抽出
+    original_text_file = tmpdir_path / "original-1.txt"
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(original_pdf),
+         "--page", "1"],
+        cwd=tmpdir_path
+    )
+    
+    assert result.returncode == 0, f"テキスト抽出失敗: {result.stderr}"
+    assert original_text_file.exists(), "テキストファイルが作成されませんでした"
+    
+    with open(original_text_file, 'r', encoding='utf-8') as f:
+        extracted_text = f.read()
+    
+    # テキストが含まれていることを確認
+    assert expected_text in extracted_text, \
+        f"期待されるテキストが見つかりません。期待: '{expected_text}', 実際: '{extracted_text}'"
+    print(f"✓ 元のPDFからテキスト抽出成功: '{extracted_text.strip()}'")
+    
+    # 4. 画像PDFからテキスト抽出（空または抽出不可のはず）
+    image_text_file = tmpdir_path / "image_based-1.txt"
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(image_pdf),
+         "--page", "1"],
+        cwd=tmpdir_path
+    )
+    
+    assert result.returncode == 0, f"画像PDFからのテキスト抽出失敗: {result.stderr}"
+    
+    with open(image_text_file, 'r', encoding='utf-8') as f:
+        image_extracted_text = f.read()
+    
+    # 画像PDFからはテキストが抽出できない（または空）ことを確認
+    # これは画像化されたため、テキストレイヤーが存在しないことを示す
+    print(f"✓ 画像PDFからのテキスト抽出結果: '{image_extracted_text.strip()}' (空またはほぼ空のはず)")
+    
+    # 統合テストの目的を達成: テキストPDFと画像PDFでテキスト抽出結果が異なることを確認
+    print("\n=== 統合テスト成功 ===")
+    print(f"元のテキストPDF: テキストあり ('{extracted_text.strip()}')")
+    print(f"画像PDF: テキストなし/限定的 ('{image_extracted_text.strip()}')")
+    print("→ PDF画像化機能が正常に動作し、テキストレイヤーが除去されました")
 
 
 if __name__ == "__main__":
-    print("=== PDF → 画像 → テキスト抽出 統合テスト ===\n")
+    import pytest
     
-    try:
-        test_full_workflow()
-        print("\n=== すべての統合テストが成功しました ===")
-        sys.exit(0)
-        
-    except AssertionError as e:
-        print(f"\n✗ テスト失敗: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n✗ テスト実行エラー: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
@@ -5,196 +5,328 @@ OCR機能のテスト
 画像PDFからのOCRテキスト抽出機能を検証
 """
 
+import logging
+import re
 import sys
-import subprocess
+import threading
 from pathlib import Path
-import tempfile
+from typing import Tuple
+
+import pytest
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import pdf_page_text
+from cli_runner import run_cli
+
+# ひらがな・カタカナ・CJK統合漢字のいずれかにマッチ
+_JP_RE = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]')
+
 
-def create_text_pdf_with_japanese(pdf_path: Path) -> str:
-    """日本語テキスト付きPDFを作成し、元のテキストを返す"""
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-        
-        # 日本語フォントを登録
-        pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))
-        
-        test_text = "これはテストです"
-        
-        c = canvas.Canvas(str(pdf_path), pagesize=A4)
-        c.setFont('HeiseiMin-W3', 24)  # 大きいフォントサイズでOCRしやすくする
-        c.drawString(100, 750, test_text)
-        c.showPage()
-        c.save()
-        
-        return test_text
-        
-    except ImportError:
-        raise ImportError("reportlab がインストールされていません")
-
-
-def test_ocr_on_image_pdf():
+def test_ocr_on_image_pdf(image_pdf: Tuple[Path, str], tmp_path: Path):
     """
     画像PDFからOCRでテキストを抽出できることをテスト
     1. テキストPDFを作成
     2. PDFを画像PDFに変換
     3. OCRエンジンで画像PDFからテキストを抽出
     """
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            
-            # 1. 日本語テキストPDFを作成
-            original_pdf = tmpdir_path / "original.pdf"
-            expected_text = create_text_pdf_with_japanese(original_pdf)
-            print(f"✓ テストPDFを作成: {original_pdf}")
-            print(f"  期待されるテキスト: '{expected_text}'")
-            
-            # 2. PDFを画像PDFに変換
-            images_dir = tmpdir_path / "images"
-            image_pdf = tmpdir_path / "image_based.pdf"
-            
-            result = subprocess.run(
-                ["python", "pdf_to_image.py",
-                 "--pdf", str(original_pdf),
-                 "--output-dir", str(images_dir),
-                 "--create-pdf",
-                 "--output-pdf", str(image_pdf),
-                 "--dpi", "300"],  # 高解像度でOCRの精度を向上
-                cwd=Path(__file__).parent.parent,
-                capture_output=True,
-                text=True
-            )
-            
-            assert result.returncode == 0, f"画像変換失敗: {result.stderr}"
-            assert image_pdf.exists(), "画像PDFが作成されませんでした"
-            print(f"✓ 画像PDFを作成: {image_pdf}")
-            
-            # 3. 画像PDFからOCRでテキストを抽出（--engine ocr を明示的に指定）
-            image_text_file = tmpdir_path / "image_based-1.txt"
-            result = subprocess.run(
-                ["python", str(Path(__file__).parent.parent / "pdf_page_text.py"),
-                 "--pdf", str(image_pdf),
-                 "--page", "1",
-                 "--engine", "ocr"],
-                cwd=tmpdir_path,
-                capture_output=True,
-                text=True
-            )
-            
-            print(f"  stdout: {result.stdout}")
-            print(f"  stderr: {result.stderr}")
-            
-            assert result.returncode == 0, f"OCR抽出失敗: {result.stderr}"
-            assert image_text_file.exists(), "OCRテキストファイルが作成されませんでした"
-            
-            with open(image_text_file, 'r', encoding='utf-8') as f:
-                ocr_text = f.read()
-            
-            print(f"✓ OCRで抽出されたテキスト: '{ocr_text.strip()}'")
-            
-            # OCRでテキストが抽出できたことを確認
-            # 注: OCRは完璧ではないため、元のテキストと完全一致しない可能性がある
-            assert ocr_text.strip(), "OCRでテキストが抽出されませんでした"
-            
-            # 日本語文字が含まれていることを確認
-            assert any('\u3040' <= c <= '\u309F' or '\u30A0' <= c <= '\u30FF' or '\u4E00' <= c <= '\u9FFF' 
-                      for c in ocr_text), "日本語文字が検出されませんでした"
-            
-            print(f"✓ OCRテスト成功")
-            
-    except ImportError:
-        print("⚠ reportlab がインストールされていないため、テストをスキップしました")
-
-
-def test_auto_fallback_to_ocr():
+    # 1-2. 画像PDF（conftest.py の image_pdf フィクスチャでセッションごとに1回だけ作成）
+    image_pdf, expected_text = image_pdf
+    tmpdir_path = tmp_path
+    print(f"✓ 画像PDFを作成: {image_pdf}")
+    print(f"  期待されるテキスト: '{expected_text}'")
+    
+    # 3. 画像PDFからOCRでテキストを抽出（--engine ocr を明示的に指定）
+    image_text_file = tmpdir_path / "image_based-1.txt"
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(image_pdf),
+         "--page", "1",
+         "--engine", "ocr"],
+        cwd=tmpdir_path
+    )
+    
+    print(f"  stdout: {result.stdout}")
+    print(f"  stderr: {result.stderr}")
+    
+    assert result.returncode == 0, f"OCR抽出失敗: {result.stderr}"
+    assert image_text_file.exists(), "OCRテキストファイルが作成されませんでした"
+    
+    with open(image_text_file, 'r', encoding='utf-8') as f:
+        ocr_text = f.read()
+    
+    print(f"✓ OCRで抽出されたテキスト: '{ocr_text.strip()}'")
+    
+    # OCRでテキストが抽出できたことを確認
+    # 注: OCRは完璧ではないため、元のテキストと完全一致しない可能性がある
+    assert ocr_text.strip(), "OCRでテキストが抽出されませんでした"
+    
+    # 日本語文字が含まれていることを確認
+    assert _JP_RE.search(ocr_text), "日本語文字が検出されませんでした"
+    
+    print(f"✓ OCRテスト成功")
+
+
+def test_auto_fallback_to_ocr(image_pdf: Tuple[Path, str], tmp_path: Path):
     """
     テキスト層がない場合に自動的にOCRにフォールバックすることをテスト
     """
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            
-            # 1. テキストPDFを作成
-            original_pdf = tmpdir_path / "original.pdf"
-            expected_text = create_text_pdf_with_japanese(original_pdf)
-            print(f"✓ テストPDFを作成: {original_pdf}")
-            
-            # 2. PDFを画像PDFに変換
-            images_dir = tmpdir_path / "images"
-            image_pdf = tmpdir_path / "image_based.pdf"
-            
-            result = subprocess.run(
-                ["python", "pdf_to_image.py",
-                 "--pdf", str(original_pdf),
-                 "--output-dir", str(images_dir),
-                 "--create-pdf",
-                 "--output-pdf", str(image_pdf),
-                 "--dpi", "300"],
-                cwd=Path(__file__).parent.parent,
-                capture_output=True,
-                text=True
-            )
-            
-            assert result.returncode == 0, f"画像変換失敗: {result.stderr}"
-            print(f"✓ 画像PDFを作成: {image_pdf}")
-            
-            # 3. 画像PDFからテキスト抽出（エンジン指定なし = pypdfがOCRにフォールバック）
-            image_text_file = tmpdir_path / "image_based-1.txt"
-            result = subprocess.run(
-                ["python", str(Path(__file__).parent.parent / "pdf_page_text.py"),
-                 "--pdf", str(image_pdf),
-                 "--page", "1"],  # --engine 指定なし
-                cwd=tmpdir_path,
-                capture_output=True,
-                text=True
-            )
-            
-            print(f"  stdout: {result.stdout}")
-            print(f"  stderr: {result.stderr}")
-            
-            assert result.returncode == 0, f"テキスト抽出失敗: {result.stderr}"
-            
-            # OCRへのフォールバックメッセージが含まれていることを確認
-            assert "OCRによる抽出を試みます" in result.stdout or "OCRでテキストを抽出しました" in result.stdout, \
-                "OCRへのフォールバックが実行されませんでした"
-            
-            with open(image_text_file, 'r', encoding='utf-8') as f:
-                ocr_text = f.read()
-            
-            print(f"✓ 自動フォールバックで抽出されたテキスト: '{ocr_text.strip()}'")
-            
-            # テキストが抽出できたことを確認
-            assert ocr_text.strip(), "自動フォールバックでテキストが抽出されませんでした"
-            
-            print(f"✓ 自動フォールバックテスト成功")
-            
-    except ImportError:
-        print("⚠ reportlab がインストールされていないため、テストをスキップしました")
+    # 1-2. 画像PDF（conftest.py の image_pdf フィクスチャでセッションごとに1回だけ作成）
+    image_pdf, expected_text = image_pdf
+    tmpdir_path = tmp_path
+    print(f"✓ 画像PDFを作成: {image_pdf}")
+    
+    # 3. 画像PDFからテキスト抽出（エンジン指定なし = pypdfがOCRにフォールバック）
+    image_text_file = tmpdir_path / "image_based-1.txt"
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(image_pdf),
+         "--page", "1"],  # --engine 指定なし
+        cwd=tmpdir_path
+    )
+    
+    print(f"  stdout: {result.stdout}")
+    print(f"  stderr: {result.stderr}")
+    
+    assert result.returncode == 0, f"テキスト抽出失敗: {result.stderr}"
+    
+    # OCRへのフォールバックメッセージが含まれていることを確認
+    assert "OCRによる抽出を試みます" in result.stdout or "OCRでテキストを抽出しました" in result.stdout, \
+        "OCRへのフォールバックが実行されませんでした"
+    
+    with open(image_text_file, 'r', encoding='utf-8') as f:
+        ocr_text = f.read()
+    
+    print(f"✓ 自動フォールバックで抽出されたテキスト: '{ocr_text.strip()}'")
+    
+    # テキストが抽出できたことを確認
+    assert ocr_text.strip(), "自動フォールバックでテキストが抽出されませんでした"
+    
+    print(f"✓ 自動フォールバックテスト成功")
+
+
+def test_fallback_when_tesserocr_import_fails(monkeypatch: pytest.MonkeyPatch):
+    """tesserocr がインストール済みでもインポートに失敗する場合、pytesseract にフォールバックすることをテスト"""
+    pytesseract = pytest.importorskip("pytesseract")
+    
+    calls = []
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda img, lang: calls.append(lang) or "テキスト")
+    # sys.modules に None を入れると import tesserocr は ImportError になる
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+    monkeypatch.setattr(pdf_page_text, "_TESS_APIS", {})
+    monkeypatch.setattr(pdf_page_text, "TESSEROCR_AVAILABLE", True)
+    monkeypatch.setattr(pdf_page_text, "PYTESSERACT_AVAILABLE", True)
+    
+    assert pdf_page_text._ocr_image(object(), "jpn") == "テキスト"
+    assert pdf_page_text._ocr_image(object(), "jpn") == "テキスト"
+    
+    # 一度失敗したら以降は tesserocr を試さない
+    assert pdf_page_text.TESSEROCR_AVAILABLE is False
+    assert calls == ["jpn", "jpn"]
+    
+    print("✓ tesserocr インポート失敗時のフォールバックテスト成功")
+
+
+def test_tesserocr_init_failure_is_cached(monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture):
+    """tesserocr の初期化失敗を言語ごとに記録し、ページごとに再初期化しないことをテスト"""
+    import types
+    
+    pytesseract = pytest.importorskip("pytesseract")
+    
+    init_calls = []
+    
+    def failing_api(lang):
+        init_calls.append(lang)
+        raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+    
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda img, lang: "テキスト")
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=failing_api))
+    monkeypatch.setattr(pdf_page_text, "_TESS_APIS", {})
+    monkeypatch.setattr(pdf_page_text, "TESSEROCR_AVAILABLE", True)
+    monkeypatch.setattr(pdf_page_text, "PYTESSERACT_AVAILABLE", True)
+    
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            assert pdf_page_text._ocr_image(object(), "jpn") == "テキスト"
+    
+    assert init_calls == ["jpn"], f"初期化が再試行されました: {init_calls}"
+    assert len(caplog.records) == 1, "フォールバックの警告が繰り返し出力されました"
+    
+    # 解放時に失敗の記録が End() の対象にならないこと
+    pdf_page_text._close_tess_apis()
+    
+    print("✓ tesserocr 初期化失敗のキャッシュテスト成功")
+
+
+def page_zoom(page, dpi=None) -> float:
+    """ページごとに異なる倍率を返す _ocr_zoom の代替（画像の幅からページを識別するため）"""
+    return (page.number + 1) / 10
+
+
+def page_from_image(img) -> int:
+    """page_zoom でレンダリングしたA4画像の幅からページ番号を求める"""
+    return round(img.width / (595.27 / 10))
+
+
+@pytest.fixture
+def stub_ocr_pipeline(monkeypatch: pytest.MonkeyPatch):
+    """Tesseract を使わずに extract_pages_text_ocr を実行できるよう差し替える"""
+    pytest.importorskip("fitz")
+    pytest.importorskip("numpy")
+    pytest.importorskip("PIL")
+    
+    monkeypatch.setattr(pdf_page_text, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pdf_page_text, "_ocr_zoom", page_zoom)
+    monkeypatch.setattr(pdf_page_text, "_ocr_image", lambda img, lang: f"page{page_from_image(img)}")
+    return monkeypatch
+
+
+def test_ocr_pipeline_keeps_page_order(stub_ocr_pipeline, sample_pdf: Path):
+    """レンダリングとOCRを並行させても、結果が page_numbers の順序で返ることをテスト"""
+    threads_before = threading.active_count()
+    
+    texts = pdf_page_text.extract_pages_text_ocr(sample_pdf, [1, 3, 2])
+    
+    assert texts == ["page1", "page3", "page2"]
+    assert threading.active_count() == threads_before, "レンダリングスレッドが終了していません"
+    
+    print("✓ OCRパイプラインのページ順序テスト成功")
+
+
+def test_ocr_pipeline_propagates_ocr_error(stub_ocr_pipeline, sample_pdf: Path):
+    """OCR中の例外が呼び出し元に伝わり、レンダリングスレッドが停止することをテスト"""
+    def failing_ocr(img, lang):
+        if page_from_image(img) == 2:
+            raise RuntimeError("OCR failed on page 2")
+        return "ok"
+    
+    stub_ocr_pipeline.setattr(pdf_page_text, "_ocr_image", failing_ocr)
+    threads_before = threading.active_count()
+    
+    with pytest.raises(RuntimeError, match="OCR failed on page 2"):
+        pdf_page_text.extract_pages_text_ocr(sample_pdf, [1, 2, 3])
+    
+    assert threading.active_count() == threads_before, "レンダリングスレッドが終了していません"
+    
+    print("✓ OCR例外の伝播テスト成功")
+
+
+def test_ocr_pipeline_propagates_render_error(stub_ocr_pipeline, sample_pdf: Path):
+    """レンダリングスレッドでの例外が呼び出し元に伝わることをテスト"""
+    def failing_zoom(page, dpi=None):
+        if page.number == 1:
+            raise RuntimeError("render failed on page 2")
+        return page_zoom(page, dpi)
+    
+    stub_ocr_pipeline.setattr(pdf_page_text, "_ocr_zoom", failing_zoom)
+    threads_before = threading.active_count()
+    
+    with pytest.raises(RuntimeError, match="render failed on page 2"):
+        pdf_page_text.extract_pages_text_ocr(sample_pdf, [1, 2, 3])
+    
+    assert threading.active_count() == threads_before, "レンダリングスレッドが終了していません"
+    
+    print("✓ レンダリング例外の伝播テスト成功")
+
+
+@pytest.mark.parametrize("width, height, expected_zoom", [
+    (595, 842, 1800 / 842),  # A4: 長辺が約1800pxになる倍率
+    (298, 420, 4.0),         # A6: 上限 4.0 で頭打ち
+    (3000, 4000, 1.0),       # 巨大なページ: 下限 1.0
+], ids=["A4", "A6", "huge"])
+def test_ocr_zoom_from_page_size(width: float, height: float, expected_zoom: float):
+    """ページサイズからOCR用のズーム倍率が決まり、1.0〜4.0 に制限されることをテスト"""
+    fitz = pytest.importorskip("fitz")
+    
+    with fitz.open() as doc:
+        page = doc.new_page(width=width, height=height)
+        zoom = pdf_page_text._ocr_zoom(page)
+    
+    assert zoom == pytest.approx(expected_zoom)
+    
+    print(f"✓ ズーム倍率テスト成功: {width}x{height}pt → {zoom:.3f}")
+
+
+def test_ocr_zoom_with_dpi():
+    """DPIを指定した場合、ページサイズに関係なく dpi/72 の倍率になることをテスト"""
+    fitz = pytest.importorskip("fitz")
+    
+    with fitz.open() as doc:
+        page = doc.new_page(width=298, height=420)
+        assert pdf_page_text._ocr_zoom(page, dpi=300) == pytest.approx(300 / 72)
+        assert pdf_page_text._ocr_zoom(page, dpi=600) == pytest.approx(600 / 72)
+    
+    print("✓ DPI指定時のズーム倍率テスト成功")
+
+
+def test_ocr_dpi_option(sample_pdf: Path, monkeypatch: pytest.MonkeyPatch):
+    """--ocr-dpi で指定した解像度でOCR用の画像がレンダリングされることをテスト"""
+    pytest.importorskip("fitz")
+    pytest.importorskip("numpy")
+    
+    sizes = []
+    monkeypatch.setattr(pdf_page_text, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pdf_page_text, "_ocr_image", lambda img, lang: sizes.append(img.size) or "text")
+    
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(sample_pdf),
+         "--page", "1",
+         "--engine", "ocr",
+         "--ocr-dpi", "72"],
+        cwd=sample_pdf.parent
+    )
+    
+    assert result.returncode == 0, f"OCR抽出失敗: {result.stderr}"
+    # 72dpi ではA4（595.27x841.89pt）がほぼそのままのピクセル数になる
+    # （自動決定なら長辺は約1800px）
+    assert len(sizes) == 1
+    width, height = sizes[0]
+    assert height == 842 and width in (595, 596), f"レンダリングサイズ: {sizes}"
+    
+    print("✓ --ocr-dpi オプションのテスト成功")
+
+
+def test_preprocess_for_ocr(sample_pdf: Path):
+    """OCR前処理で1チャンネルの二値画像（0/255のみ）になることをテスト"""
+    pytest.importorskip("cv2")
+    fitz = pytest.importorskip("fitz")
+    np = pytest.importorskip("numpy")
+    
+    with fitz.open(str(sample_pdf)) as doc:
+        pix = doc[0].get_pixmap(alpha=False, colorspace=fitz.csRGB)
+    arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+    
+    img = pdf_page_text._preprocess_for_ocr(arr)
+    
+    assert img.mode == "L", f"期待されるモード: L、実際: {img.mode}"
+    assert img.size == (pix.width, pix.height)
+    values = set(np.unique(np.asarray(img)).tolist())
+    assert values <= {0, 255}, f"二値化されていない画素値があります: {sorted(values - {0, 255})[:10]}"
+    # テキストを描画したページなので、黒と白の両方を含む
+    assert values == {0, 255}
+    
+    print("✓ OCR前処理テスト成功")
+
+
+def test_ocr_preprocess_without_opencv(sample_pdf: Path, monkeypatch: pytest.MonkeyPatch):
+    """OpenCV がない環境で --ocr-preprocess を指定した場合にエラーになることをテスト"""
+    monkeypatch.setattr(pdf_page_text, "CV2_AVAILABLE", False)
+    
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(sample_pdf),
+         "--page", "1",
+         "--ocr-preprocess"],
+        cwd=sample_pdf.parent
+    )
+    
+    assert result.returncode == 1
+    assert "--ocr-preprocess が指定されましたが、OpenCV がインストールされていません" in result.stderr
+    
+    print("✓ OpenCV なしでの --ocr-preprocess エラーテスト成功")
 
 
 if __name__ == "__main__":
-    print("=== OCR機能テスト ===\n")
-    
-    try:
-        test_ocr_on_image_pdf()
-        print()
-        test_auto_fallback_to_ocr()
-        
-        print("\n=== すべてのOCRテストが成功しました ===")
-        sys.exit(0)
-        
-    except AssertionError as e:
-        print(f"\n✗ テスト失敗: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n✗ テスト実行エラー: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
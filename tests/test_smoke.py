@@ -5,21 +5,40 @@ pdf_page_text.py のスモークテスト
 基本的な動作を確認するための最小限のテスト
 """
 
+import io
+import os
 import sys
-import subprocess
 from pathlib import Path
 
+import pytest
+
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import pdf_page_text
+from cli_runner import run_cli
+
+
+def write_text_pdf(pdf_path: Path, text: str) -> None:
+    """1行のテキストを描画した1ページのPDFを作成"""
+    pytest.importorskip("reportlab")
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    
+    # メモリ上に生成してから1回で書き出す
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.drawString(100, 750, text)
+    c.showPage()
+    c.save()
+    pdf_path.write_bytes(buf.getvalue())
+
 
 def test_help_option():
     """ヘルプオプションが正常に動作することを確認"""
-    result = subprocess.run(
-        ["python", "pdf_page_text.py", "--help"],
-        cwd=Path(__file__).parent.parent,
-        capture_output=True,
-        text=True
+    result = run_cli(
+        pdf_page_text,
+        ["--help"]
     )
     assert result.returncode == 0
     assert "PDFファイルの指定ページからテキストを抽出" in result.stdout
@@ -28,73 +47,108 @@ def test_help_option():
 
 def test_missing_pdf_file():
     """存在しないPDFファイルを指定した場合のエラーハンドリングを確認"""
-    result = subprocess.run(
-        ["python", "pdf_page_text.py", "--pdf", "nonexistent.pdf", "--page", "1"],
-        cwd=Path(__file__).parent.parent,
-        capture_output=True,
-        text=True
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", "nonexistent.pdf", "--page", "1"]
     )
     assert result.returncode == 1
     assert "PDFファイルが見つかりません" in result.stderr
     print("✓ 存在しないファイルのエラーハンドリングテスト成功")
 
 
-def test_invalid_page_number():
+def test_invalid_page_number(tmp_path: Path):
     """無効なページ番号を指定した場合のエラーハンドリングを確認"""
     # まず、テスト用の簡単なPDFを作成
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        
-        test_pdf_path = Path(__file__).parent / "test_temp.pdf"
-        c = canvas.Canvas(str(test_pdf_path), pagesize=A4)
-        c.drawString(100, 750, "Test Page 1")
-        c.showPage()
-        c.save()
-        
-        # ページ0を指定（無効）
-        result = subprocess.run(
-            ["python", "pdf_page_text.py", "--pdf", str(test_pdf_path), "--page", "0"],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
-        assert result.returncode == 1
-        assert "ページ番号は1以上である必要があります" in result.stderr
-        
-        # 範囲外のページを指定
-        result = subprocess.run(
-            ["python", "pdf_page_text.py", "--pdf", str(test_pdf_path), "--page", "999"],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
-        assert result.returncode == 1
-        assert "ページ番号が範囲外です" in result.stderr
-        
-        # クリーンアップ
-        test_pdf_path.unlink()
-        
-        print("✓ 無効なページ番号のエラーハンドリングテスト成功")
-        
-    except ImportError:
-        print("⚠ reportlab がインストールされていないため、一部のテストをスキップしました")
+    test_pdf_path = tmp_path / "test_temp.pdf"
+    write_text_pdf(test_pdf_path, "Test Page 1")
+    
+    # ページ0を指定（無効）
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(test_pdf_path), "--page", "0"]
+    )
+    assert result.returncode == 1
+    assert "ページ番号は1以上である必要があります" in result.stderr
+    
+    # 範囲外のページを指定
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(test_pdf_path), "--page", "999"]
+    )
+    assert result.returncode == 1
+    assert "ページ番号が範囲外です" in result.stderr
+    
+    print("✓ 無効なページ番号のエラーハンドリングテスト成功")
+
+
+def test_close_all_docs(sample_pdf: Path):
+    """_close_all_docs がキャッシュしたドキュメントを閉じることを確認"""
+    pytest.importorskip("fitz")
+    
+    doc = pdf_page_text._open_doc(str(sample_pdf), sample_pdf.stat().st_mtime_ns)
+    assert pdf_page_text._open_doc(str(sample_pdf), sample_pdf.stat().st_mtime_ns) is doc
+    
+    pdf_page_text._close_all_docs()
+    
+    assert doc.is_closed, "キャッシュしたドキュメントが閉じられていません"
+    assert not pdf_page_text._OPEN_DOCS
+    
+    print("✓ ドキュメントのクローズテスト成功")
+
+
+def test_cache_disabled_by_default(sample_pdf: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """--cache を指定しない場合はキャッシュに書き込まないことを確認"""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(pdf_page_text, "_CACHE_DIR", cache_dir)
+    
+    result = run_cli(
+        pdf_page_text,
+        ["--pdf", str(sample_pdf), "--page", "1"],
+        cwd=tmp_path
+    )
+    assert result.returncode == 0, f"抽出失敗: {result.stderr}"
+    assert not cache_dir.exists(), "キャッシュが無効でもキャッシュディレクトリが作成されました"
+    
+    print("✓ キャッシュ無効時のテスト成功")
+
+
+def test_cache_reextracts_after_pdf_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """PDFが書き換えられた場合にキャッシュを使わず再抽出することを確認"""
+    monkeypatch.setattr(pdf_page_text, "_CACHE_DIR", tmp_path / "cache")
+    pdf_path = tmp_path / "cached.pdf"
+    
+    write_text_pdf(pdf_path, "First version")
+    text = pdf_page_text.extract_page_text(pdf_path, 1, use_cache=True)
+    assert "First version" in text
+    
+    # 同じPDFはキャッシュから同じ結果が返る
+    assert pdf_page_text.extract_page_text(pdf_path, 1, use_cache=True) == text
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    
+    # PDFを書き換える（更新日時の分解能に依存しないよう、更新日時も明示的に進める）
+    mtime_ns = pdf_path.stat().st_mtime_ns
+    write_text_pdf(pdf_path, "Second version")
+    os.utime(pdf_path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    
+    text = pdf_page_text.extract_page_text(pdf_path, 1, use_cache=True)
+    assert "Second version" in text, f"書き換え後のテキストが抽出されませんでした: {text!r}"
+    
+    print("✓ PDF更新時の再抽出テスト成功")
+
+
+def test_cache_entry_limit(sample_pdf: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """キャッシュのエントリ数が上限を超えないことを確認"""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(pdf_page_text, "_CACHE_DIR", cache_dir)
+    monkeypatch.setattr(pdf_page_text, "_CACHE_MAX_ENTRIES", 2)
+    
+    for page_number in range(1, 4):
+        pdf_page_text.extract_page_text(sample_pdf, page_number, use_cache=True)
+    
+    assert len(list(cache_dir.glob("*.txt"))) == 2
+    
+    print("✓ キャッシュのエントリ数上限テスト成功")
 
 
 if __name__ == "__main__":
-    print("=== pdf_page_text.py スモークテスト ===\n")
-    
-    try:
-        test_help_option()
-        test_missing_pdf_file()
-        test_invalid_page_number()
-        
-        print("\n=== すべてのテストが成功しました ===")
-        sys.exit(0)
-        
-    except AssertionError as e:
-        print(f"\n✗ テスト失敗: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n✗ テスト実行エラー: {e}")
-        sys.exit(1)
+    sys.exit(pytest.main([__file__, "-v", "-s"]))